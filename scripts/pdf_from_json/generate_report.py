@@ -8,38 +8,73 @@ Usage:
 from __future__ import annotations
 
 import argparse
+import functools
+import hashlib
 import json
 import re
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
+from itertools import groupby, repeat
+from operator import itemgetter
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from dateutil import parser as dateparser
+import orjson
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
 from reportlab.lib.units import mm
+from reportlab.pdfbase.pdfmetrics import stringWidth
 from reportlab.platypus import Image, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
 import io
-import tempfile
-import matplotlib.dates as mdates
-import matplotlib.pyplot as plt
 import os
 
+_NONALNUM_RE = re.compile(r"[^a-zA-Z0-9\s]")
+_WS_RE = re.compile(r"\s+")
+
+@functools.lru_cache(maxsize=2048)
 def safe_id(name: str) -> str:
-    name = re.sub(r"[^a-zA-Z0-9\s]", "", name)
-    return re.sub(r"\s+", "_", name).strip("_").lower()
+    name = _NONALNUM_RE.sub("", name)
+    return _WS_RE.sub("_", name).strip("_").lower()
+
+# Unambiguous layouts seen in the input JSONs; anything else goes through dateutil.
+# Day-first numeric layouts are deliberately absent so results match dateutil's defaults.
+_DATE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%d %b %Y", "%d-%b-%Y", "%Y-%m-%dT%H:%M:%S")
+
+@functools.lru_cache(maxsize=8192)
+def _parse_date_cached(s: str) -> datetime:
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(s, fmt)
+        except ValueError:
+            continue
+    return dateparser.parse(s)
 
 def parse_date(s: str) -> datetime:
+    return _parse_date_cached(s)
+
+def try_parse_date(s: Optional[str]) -> Optional[datetime]:
+    """Like parse_date, but returns None for empty or unparseable input."""
+    if not s: return None
     try:
-        return dateparser.parse(s)
+        return parse_date(s)
     except Exception:
-        return datetime.strptime(s, "%Y/%m/%d")
+        return None
+
+# orjson rejects NaN/Infinity and silently turns integers wider than 64 bits into floats,
+# both of which stdlib json loads faithfully; such inputs take the stdlib path.
+_WIDE_INT_RE = re.compile(rb"\d{20,}")
 
 def load_data(path: Path) -> Dict[str, Any]:
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+    raw = path.read_bytes()
+    if _WIDE_INT_RE.search(raw) is None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(raw)
 
 def is_numeric(v: Any) -> bool:
     try:
@@ -48,32 +83,88 @@ def is_numeric(v: Any) -> bool:
         return True
     except Exception: return False
 
+_RANGE_RE = re.compile(r"([\d.]+)\s*-\s*([\d.]+)")
+_LT_RE = re.compile(r"<\s*([\d.]+)")
+_GT_RE = re.compile(r">\s*([\d.]+)")
+
+@functools.lru_cache(maxsize=512)
 def parse_range(ref_str: str) -> Tuple[Optional[float], Optional[float]]:
     """Extracts numeric min and max bounds from common ref range string patterns."""
     if not ref_str: return None, None
     ref_str = ref_str.replace(",", "").strip()
+    if not any(c.isdigit() for c in ref_str): return None, None
 
     # e.g "150000-450000" or "0.27 - 4.2"
-    m = re.search(r"([\d\.]+)\s*-\s*([\d\.]+)", ref_str)
+    m = _RANGE_RE.search(ref_str)
     if m:
         return float(m.group(1)), float(m.group(2))
 
     # e.g "< 150"
-    m = re.search(r"<\s*([\d\.]+)", ref_str)
+    m = _LT_RE.search(ref_str)
     if m: return None, float(m.group(1))
 
     # e.g "> 40"
-    m = re.search(r">\s*([\d\.]+)", ref_str)
+    m = _GT_RE.search(ref_str)
     if m: return float(m.group(1)), None
 
     return None, None
 
-def render_chart(points: List[Dict[str, Any]], chart_type: str, fallback_color: str) -> io.BytesIO:
+# Bump whenever the chart drawing changes so stale cached PNGs are not reused.
+_CHART_CACHE_VERSION = 2
+
+def chart_cache_key(points: List[Dict[str, Any]], chart_type: str, fallback_color: str) -> str:
+    """Content hash of everything that influences a rendered chart."""
+    payload = (
+        _CHART_CACHE_VERSION,
+        tuple((p["dt"].isoformat(), float(p["value"])) for p in points),
+        chart_type,
+        fallback_color,
+        points[-1].get("ref_range", ""),
+    )
+    return hashlib.blake2b(repr(payload).encode(), digest_size=16).hexdigest()
+
+def render_chart(
+    points: List[Dict[str, Any]],
+    chart_type: str,
+    fallback_color: str,
+    cache_dir: Optional[Path] = None
+) -> io.BytesIO:
+    """Returns the chart PNG, reusing a previously rendered copy from cache_dir when present."""
+    if cache_dir is None:
+        return _draw_chart(points, chart_type, fallback_color)
+
+    cache_file = cache_dir / f"{chart_cache_key(points, chart_type, fallback_color)}.png"
+    if cache_file.exists():
+        return io.BytesIO(cache_file.read_bytes())
+
+    buf = _draw_chart(points, chart_type, fallback_color)
+    # Write to a sibling temp file and rename so concurrent runs never see a partial PNG
+    tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_file.write_bytes(buf.getvalue())
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        pass # The cache is best-effort; the freshly rendered chart is still usable
+    return buf
+
+def _draw_chart(points: List[Dict[str, Any]], chart_type: str, fallback_color: str) -> io.BytesIO:
+    # Imported lazily: matplotlib's import and font cache setup dominate start-up, and
+    # runs with diagrams disabled (or served entirely from the chart cache) never need them.
+    import matplotlib.dates as mdates
+    import numpy as np
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    from PIL import Image as PILImage
+
     dates = [p["dt"] for p in points]
-    values = [float(p["value"]) for p in points]
+    values = np.fromiter((float(p["value"]) for p in points), dtype=np.float64, count=len(points))
 
-    # Extremely tight figure to eliminate whitespace
-    fig, ax = plt.subplots(figsize=(4.5, 1.1), dpi=150)
+    # Extremely tight figure to eliminate whitespace. Built on an Agg canvas directly;
+    # pyplot's global figure registry is not needed.
+    fig = Figure(figsize=(4.5, 1.1), dpi=150)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
     fig.subplots_adjust(left=0.08, right=0.98, top=0.95, bottom=0.25)
 
     # Extract structural ideal range from the latest point
@@ -83,21 +174,18 @@ def render_chart(points: List[Dict[str, Any]], chart_type: str, fallback_color:
     if r_min is not None and r_max is not None:
         ax.axhspan(r_min, r_max, color="#c2f0c2", alpha=0.4, lw=0, zorder=0) # Faint green
     elif r_max is not None:
-        ax.axhspan(min(values + [0]) if min(values + [0]) >= 0 else min(values), r_max, color="#c2f0c2", alpha=0.4, lw=0, zorder=0)
+        ax.axhspan(min(values.min(), 0.0), r_max, color="#c2f0c2", alpha=0.4, lw=0, zorder=0)
     elif r_min is not None:
-        ax.axhspan(r_min, max(values) * 1.1, color="#c2f0c2", alpha=0.4, lw=0, zorder=0)
-
-    # 2. Determine Conditional Colors (Dark Green / Dark Red)
-    colors = []
-    for v in values:
-        if r_min is not None and r_max is not None:
-             colors.append("#1a7a1a" if r_min <= v <= r_max else "#d92626") # Dark green or red
-        elif r_max is not None:
-             colors.append("#1a7a1a" if v <= r_max else "#d92626")
-        elif r_min is not None:
-             colors.append("#1a7a1a" if v >= r_min else "#d92626")
-        else:
-             colors.append(fallback_color)
+        ax.axhspan(r_min, values.max() * 1.1, color="#c2f0c2", alpha=0.4, lw=0, zorder=0)
+
+    # 2. Determine Conditional Colors (Dark Green / Dark Red), one vectorised comparison per bound
+    if r_min is None and r_max is None:
+        colors = [fallback_color] * len(values)
+    else:
+        in_range = np.ones(len(values), dtype=bool)
+        if r_min is not None: in_range &= values >= r_min
+        if r_max is not None: in_range &= values <= r_max
+        colors = np.where(in_range, "#1a7a1a", "#d92626").tolist() # Dark green or red
 
     # 3. Plot Data
     if chart_type == "bar":
@@ -120,17 +208,29 @@ def render_chart(points: List[Dict[str, Any]], chart_type: str, fallback_color:
     ax.grid(axis='y', alpha=0.3, linestyle="--", zorder=0)
 
     buf = io.BytesIO()
-    # bbox_inches='tight' and pad_inches=0 completely shave off surrounding whitespace
-    fig.savefig(buf, format="png", dpi=150, bbox_inches='tight', pad_inches=0.02)
-    plt.close(fig)
+    # bbox_inches='tight' and pad_inches=0 completely shave off surrounding whitespace.
+    # zlib dominates PNG encoding time, so trade a few bytes for the fastest level.
+    fig.savefig(buf, format="png", dpi=150, bbox_inches='tight', pad_inches=0.02,
+                pil_kwargs={"compress_level": 1})
     buf.seek(0)
-    return buf
+
+    # The charts only use a handful of flat colours, so a small adaptive palette plus
+    # an optimize pass shrinks the PNG that ReportLab embeds into the PDF.
+    with PILImage.open(buf) as im:
+        pal = im.convert("RGB").convert("P", palette=PILImage.Palette.ADAPTIVE, colors=32)
+    out = io.BytesIO()
+    pal.save(out, "PNG", optimize=True, compress_level=9)
+    out.seek(0)
+    return out
 
 def filter_and_sort_readings(
     tests_data: Dict[str, List[Dict[str, Any]]],
     config: Dict[str, Any]
 ) -> Dict[str, List[Dict[str, Any]]]:
-    """Filters, limits, and sorts the clustered readings based on config."""
+    """Filters, limits, and sorts the clustered readings based on config.
+
+    For the date strategies each test's readings are expected in ascending date order.
+    """
     result = {}
 
     # Extract config
@@ -163,11 +263,13 @@ def filter_and_sort_readings(
         if not filtered_readings:
             continue
 
-        # Sort internally based on strategy
+        # Sort internally based on strategy. For date strategies readings arrive
+        # date-ascending from process_file and filtering keeps that order, so ascending
+        # needs no work and the stable descending sort is close to linear.
         if sort_strategy == "by_date_des":
-             filtered_readings.sort(key=lambda x: x["dt"], reverse=True)
+             filtered_readings.sort(key=itemgetter("dt"), reverse=True)
         elif sort_strategy == "by_date_asc":
-             filtered_readings.sort(key=lambda x: x["dt"], reverse=False)
+             pass
         elif sort_strategy == "by_name_asc":
              filtered_readings.sort(key=lambda x: str(x["value"]).lower(), reverse=False)
         elif sort_strategy == "by_name_des":
@@ -191,10 +293,51 @@ def determine_test_order(tests_available: List[str], config: Dict[str, Any]) ->
             ordered.append(t)
 
     # 2. Add remaining unlisted tests alphabetically
-    unlisted = sorted([t for t in tests_available if t not in ordered], key=lambda x: x.lower())
+    ordered_set = set(ordered)
+    unlisted = sorted((t for t in tests_available if t not in ordered_set), key=str.lower)
     ordered.extend(unlisted)
     return ordered
 
+def format_conditions(conditions: List[Dict[str, Any]], date_format: str) -> str:
+    """Summarises a patient's conditions for the report header.
+
+    Not memoised: pregnancy week/day counts depend on the current time.
+    """
+    cond_strs = []
+    for c in conditions:
+        c_name = c.get("name", "")
+        if c_name.lower() == "pregnancy" and "last_menstrual_period" in c:
+            # Any failure (unparseable or timezone-aware LMP, etc.) falls back to the bare name
+            try:
+                lmp = parse_date(c["last_menstrual_period"])
+                now = datetime.now()
+                days_pregnant = (now - lmp).days
+                weeks = days_pregnant // 7
+                days = days_pregnant % 7
+                edd = lmp + timedelta(days=280)
+                cond_strs.append(f"Pregnancy ({weeks}W {days}D | EDD: {edd.strftime(date_format)})")
+            except Exception:
+                cond_strs.append(c_name)
+        else:
+            d_str = ""
+            parsed_d = try_parse_date(c.get("diagnosed_date"))
+            if parsed_d:
+                 try: d_str = f" (Diagnosed: {parsed_d.strftime(date_format)})"
+                 except Exception: pass
+            cond_strs.append(f"{c_name}{d_str}")
+
+    return ", ".join(cond_strs) if cond_strs else "None Reported"
+
+def value_runs(readings: List[Dict[str, Any]], key: str, first_row: int) -> List[Tuple[int, int, Any]]:
+    """Groups consecutive readings sharing readings[i][key] into (start_row, end_row, value) runs."""
+    runs = []
+    row = first_row
+    for val, group in groupby(readings, key=itemgetter(key)):
+        count = sum(1 for _ in group)
+        runs.append((row, row + count - 1, val))
+        row += count
+    return runs
+
 def build_pdf(
     grouped_tests: Dict[str, List[Dict[str, Any]]],
     ordered_names: List[str],
@@ -231,38 +374,11 @@ def build_pdf(
 
     p_name = patient_meta.get('name', 'Unknown')
     p_gender = patient_meta.get('gender', 'Unknown')
+    # DOB arrives pre-parsed from process_file; None means missing or unparseable
+    dob_dt = patient_meta.get('dob_dt')
+    p_dob = dob_dt.strftime(date_format) if dob_dt else patient_meta.get('dob') or "Unknown"
 
-    raw_dob = patient_meta.get('dob')
-    p_dob = "Unknown"
-    if raw_dob:
-        try: p_dob = parse_date(raw_dob).strftime(date_format)
-        except Exception: p_dob = raw_dob
-
-    cond_strs = []
-    for c in patient_meta.get("conditions", []):
-        c_name = c.get("name", "")
-        if c_name.lower() == "pregnancy" and "last_menstrual_period" in c:
-            try:
-                lmp = parse_date(c["last_menstrual_period"])
-                now = datetime.now()
-                days_pregnant = (now - lmp).days
-                weeks = days_pregnant // 7
-                days = days_pregnant % 7
-                edd = lmp + timedelta(days=280)
-                cond_strs.append(f"Pregnancy ({weeks}W {days}D | EDD: {edd.strftime(date_format)})")
-            except Exception:
-                cond_strs.append(c_name)
-        else:
-            d_date = c.get("diagnosed_date")
-            d_str = ""
-            if d_date:
-                 try:
-                     parsed_d = parse_date(d_date)
-                     d_str = f" (Diagnosed: {parsed_d.strftime(date_format)})"
-                 except Exception: pass
-            cond_strs.append(f"{c_name}{d_str}")
-
-    conditions_txt = ", ".join(cond_strs) if cond_strs else "None Reported"
+    conditions_txt = patient_meta.get("conditions_txt") or "None Reported"
 
     header_data = [
         [Paragraph("PATIENT NAME", hdr_style_label), Paragraph("DOB", hdr_style_label), Paragraph("GENDER", hdr_style_label)],
@@ -290,6 +406,23 @@ def build_pdf(
 
     cell_style = ParagraphStyle("Cell", parent=styles["Normal"], fontSize=9, leading=10)
 
+    # Calculate A4 Portrait Widths (210mm max - 28mm margin = 182mm usable)
+    # Test Name (60), Date (28), Reading (34), Ref(30), Context(30)
+    colWidths = [60*mm, 28*mm, 34*mm, 30*mm, 30*mm]
+
+    # Plain string cells skip Paragraph's markup parsing entirely; only text too wide
+    # for its column (less the default 6pt side paddings) needs a Paragraph to wrap.
+    # Long ref ranges and contexts repeat across tests, and Table re-wraps every cell
+    # to its own width right before drawing it, so one Paragraph per text is shared.
+    para_cache: Dict[str, Paragraph] = {}
+    def table_cell(text: str, col: int):
+        if stringWidth(text, cell_style.fontName, cell_style.fontSize) <= colWidths[col] - 12:
+            return text
+        para = para_cache.get(text)
+        if para is None:
+            para = para_cache[text] = Paragraph(text, cell_style)
+        return para
+
     # Construct the data table and record span commands
     table_data = [["Test Name", "Date", "Reading", "Ref Range", "Context"]]
     style_cmds = [
@@ -299,6 +432,7 @@ def build_pdf(
         ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
         ("ALIGN", (0, 0), (-1, -1), "CENTER"),    # Everything centered by default
         ("ALIGN", (0, 1), (0, -1), "LEFT"),       # Test name left-aligned
+        ("ALIGN", (3, 1), (4, -1), "LEFT"),       # Ref range and context left-aligned, as when wrapped
     ]
 
     current_row = 1
@@ -309,34 +443,19 @@ def build_pdf(
 
         start_row_for_test = current_row
 
-        # To handle Context and Ref Range spanning, track chunks of identical values
-        # Chunk structure: (start_row, end_row)
-        ref_chunks: List[Tuple[int, int, str]] = []
-        ctx_chunks: List[Tuple[int, int, str]] = []
-
-        curr_ref_start = current_row
-        curr_ref_val = readings[0]["ref_range"]
-
-        curr_ctx_start = current_row
-        curr_ctx_val = readings[0]["context"]
+        # To handle Context and Ref Range spanning, precompute runs of identical values.
+        # Only the first row of a run gets a Paragraph; the rest are covered by SPAN.
+        ref_chunks = value_runs(readings, "ref_range", current_row)
+        ctx_chunks = value_runs(readings, "context", current_row)
+        ref_starts = {sr for (sr, er, val) in ref_chunks}
+        ctx_starts = {sr for (sr, er, val) in ctx_chunks}
 
         for i, r in enumerate(readings):
-             # End chunk if changes or if last item
-             if r["ref_range"] != curr_ref_val:
-                 ref_chunks.append((curr_ref_start, current_row - 1, curr_ref_val))
-                 curr_ref_start = current_row
-                 curr_ref_val = r["ref_range"]
-
-             if r["context"] != curr_ctx_val:
-                 ctx_chunks.append((curr_ctx_start, current_row - 1, curr_ctx_val))
-                 curr_ctx_start = current_row
-                 curr_ctx_val = r["context"]
-
              # Append data row. If it's a spanned cell, subsequent rows just have empty strings there,
              # though ReportLab ignores the content due to SPAN.
-             name_cell = Paragraph(t_name, cell_style) if i == 0 else ""
-             ref_cell = Paragraph(str(r["ref_range"]), cell_style) if current_row == curr_ref_start else ""
-             ctx_cell = Paragraph(str(r["context"]), cell_style) if current_row == curr_ctx_start else ""
+             name_cell = table_cell(t_name, 0) if i == 0 else ""
+             ref_cell = table_cell(str(r["ref_range"]), 3) if current_row in ref_starts else ""
+             ctx_cell = table_cell(str(r["context"]), 4) if current_row in ctx_starts else ""
 
              reading_display = f"{r['value']} {r['unit']}".strip()
 
@@ -349,10 +468,6 @@ def build_pdf(
              ])
              current_row += 1
 
-        # Flush final chunks
-        ref_chunks.append((curr_ref_start, current_row - 1, curr_ref_val))
-        ctx_chunks.append((curr_ctx_start, current_row - 1, curr_ctx_val))
-
         # Add SPAN commands
         # 1. Span Test Name
         if num_readings > 1:
@@ -378,16 +493,12 @@ def build_pdf(
 
 
     if len(table_data) > 1: # We have data beyond header
-        # Calculate A4 Portrait Widths (210mm max - 28mm margin = 182mm usable)
-        # Test Name (60), Date (28), Reading (34), Ref(30), Context(30)
-        colWidths = [60*mm, 28*mm, 34*mm, 30*mm, 30*mm]
         tbl = Table(table_data, colWidths=colWidths, repeatRows=1)
         tbl.setStyle(TableStyle(style_cmds))
         story.append(tbl)
     else:
         story.append(Paragraph("No data matched the configuration criteria.", styles["Normal"]))
 
-    tmp_files = []
     if diagram_config.get("create", False):
         min_readings = diagram_config.get("min_readings_for_diagram", 2)
         diagram_tests = {t["name"]: t for t in diagram_config.get("tests", [])}
@@ -399,6 +510,8 @@ def build_pdf(
 
         default_type = diagram_config.get("default_type", "line")
         default_color = diagram_config.get("default_color", "blue")
+        sort_strategy = config.get("sort", "by_date_des")
+        cache_dir = out_path.parent / ".chart_cache" if diagram_config.get("cache", True) else None
 
         story.append(Spacer(1, 10))
         heading_style = ParagraphStyle("Heading2", parent=styles["Heading2"], fontSize=10, textColor=colors.darkgray)
@@ -411,22 +524,17 @@ def build_pdf(
             if not include_all_diag and t_name not in diag_include_set: continue
 
             readings = grouped_tests[t_name]
+            # Charts plot oldest to newest; the by_date_asc table order already is
             numeric_readings = [r for r in readings if is_numeric(r["value"])]
-            numeric_readings.sort(key=lambda x: x["dt"])
+            if sort_strategy != "by_date_asc":
+                numeric_readings.sort(key=itemgetter("dt"))
             if len(numeric_readings) >= min_readings:
                 cfg = diagram_tests.get(t_name, {})
                 c_type = cfg.get("type", default_type)
                 c_color = cfg.get("color", default_color)
 
-                imgbuf = render_chart(numeric_readings, c_type, c_color)
-                tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".png")
-                try:
-                    tmp.write(imgbuf.getbuffer())
-                finally:
-                    tmp.close()
-                tmp_files.append(tmp.name)
-
-                img = Image(tmp.name, width=85 * mm, height=22 * mm) # Smaller size!
+                imgbuf = render_chart(numeric_readings, c_type, c_color, cache_dir)
+                img = Image(imgbuf, width=85 * mm, height=22 * mm) # Smaller size!
 
                 # Bundle the title and image into a sub-table
                 cell_table = Table([
@@ -463,9 +571,24 @@ def build_pdf(
 
     doc.build(story)
 
-    for fn in tmp_files:
-        try: os.unlink(fn)
-        except Exception: pass
+def _iter_leaves(rec: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Yields the reading nodes of a record in document order, however deeply panels nest.
+
+    The record itself counts when it carries a "result"; any nested node with a "tests"
+    list is a panel and only its children are yielded.
+    """
+    if "result" in rec:
+        yield rec
+
+    children = rec.get("tests")
+    stack = list(reversed(children)) if isinstance(children, list) else []
+    while stack:
+        node = stack.pop()
+        children = node.get("tests")
+        if isinstance(children, list):
+            stack.extend(reversed(children))
+        else:
+            yield node
 
 def process_file(file_path: Path, config: Dict[str, Any], output_dir: Path, global_meta: Dict[str, Any]):
     data = load_data(file_path)
@@ -473,60 +596,74 @@ def process_file(file_path: Path, config: Dict[str, Any], output_dir: Path, glob
     # 1. Collect all raw readings into test groups
     raw_aggregated: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
 
-    def proc_node(name: str, date_str: str, rec: Dict, result: Any, unit: str, ref_range: str):
-         if not name or result is None or str(result) == "": return
+    def proc_node(name: str, dt: datetime, date_str: str, rec_meta: Tuple[Optional[str], Optional[str], str],
+                  result: Any, unit: str, ref_range: str):
+         doc_name, facility_name, context = rec_meta
 
          raw_aggregated[name].append({
-              "dt": parse_date(date_str),
+              "dt": dt,
               "date_str": date_str,
               "value": result,
               "unit": unit,
               "ref_range": ref_range,
-              "context": rec.get("context", "")
+              "context": context
          })
 
          # Global Meta Extraction
+         # The meta maps are defaultdicts, so each entry costs a single lookup;
+         # an id of None marks a fresh entry, seeded as-is from its first reading.
          tid = safe_id(name)
-         if tid not in global_meta["tests"]:
-             global_meta["tests"][tid] = {"id": tid, "name": name, "unit": unit, "range": ref_range}
+         t = global_meta["tests"][tid]
+         if t["id"] is None:
+             t.update(id=tid, name=name, unit=unit, range=ref_range)
          else:
-             if unit: global_meta["tests"][tid]["unit"] = unit
-             if ref_range: global_meta["tests"][tid]["range"] = ref_range
-
-         meta_node = rec.get("meta", {})
-         doc_name = meta_node.get("ref_doc")
-         facility_name = meta_node.get("facility")
-         context = rec.get("context")
+             if unit: t["unit"] = unit
+             if ref_range: t["range"] = ref_range
 
          if doc_name:
              did = safe_id(doc_name)
-             if did not in global_meta["doctors"]:
-                  global_meta["doctors"][did] = {"id": did, "display_name": doc_name, "contexts": set(), "visit_dates": set()}
-             if context: global_meta["doctors"][did]["contexts"].add(context)
-             global_meta["doctors"][did]["visit_dates"].add(date_str)
+             d = global_meta["doctors"][did]
+             if d["id"] is None:
+                 d["id"] = did
+                 d["display_name"] = doc_name
+             if context: d["contexts"].add(context)
+             d["visit_dates"].add(date_str)
 
          if facility_name:
              fid = safe_id(facility_name)
-             if fid not in global_meta["facilities"]:
-                  global_meta["facilities"][fid] = {"id": fid, "name": facility_name, "contexts": set(), "visit_dates": set()}
-             if context: global_meta["facilities"][fid]["contexts"].add(context)
-             global_meta["facilities"][fid]["visit_dates"].add(date_str)
+             f = global_meta["facilities"][fid]
+             if f["id"] is None:
+                 f["id"] = fid
+                 f["name"] = facility_name
+             if context: f["contexts"].add(context)
+             f["visit_dates"].add(date_str)
 
 
     for rec in data.get("reading", []):
         date_raw = rec.get("date")
         if not date_raw: continue
 
-        if "result" in rec:
-            proc_node(rec.get("name"), date_raw, rec, rec.get("result"), rec.get("unit", ""), rec.get("ref_range", ""))
-
-        if "tests" in rec and isinstance(rec["tests"], list):
-            for t in rec["tests"]:
-                if "tests" in t and isinstance(t["tests"], list):
-                     for tt in t["tests"]:
-                          proc_node(tt.get("name"), date_raw, rec, tt.get("result"), tt.get("unit", ""), tt.get("ref_range", ""))
-                else:
-                     proc_node(t.get("name"), date_raw, rec, t.get("result"), t.get("unit", ""), t.get("ref_range", ""))
+        # Record-level values are shared by every reading underneath, so resolve them once.
+        # Date and meta are resolved on the first usable reading; records without one are
+        # skipped without ever touching their (possibly placeholder) fields.
+        dt = None
+        rec_meta = None
+
+        for node in _iter_leaves(rec):
+            name = node.get("name")
+            result = node.get("result")
+            if not name or result is None or str(result) == "": continue
+            if dt is None:
+                dt = parse_date(date_raw)
+                meta_node = rec.get("meta", {})
+                rec_meta = (meta_node.get("ref_doc"), meta_node.get("facility"), rec.get("context", ""))
+            proc_node(name, dt, date_raw, rec_meta, result, node.get("unit", ""), node.get("ref_range", ""))
+
+    # Date strategies rely on readings being sorted by date once here. Other strategies
+    # keep input order, so their ties still fall back to the order readings were found in.
+    if config.get("sort", "by_date_des") in ("by_date_des", "by_date_asc"):
+        for readings in raw_aggregated.values():
+            readings.sort(key=itemgetter("dt"))
 
     # 2. Filter, Sort, Limit
     filtered_groups = filter_and_sort_readings(raw_aggregated, config)
@@ -548,10 +685,55 @@ def process_file(file_path: Path, config: Dict[str, Any], output_dir: Path, glob
                               .replace("{HHMMSS}", timestamp.strftime("%H%M%S"))
     out_file = output_dir / file_name
 
-    patient_meta = {"name": patient_name, "dob": data.get("dob"), "gender": data.get("gender"), "conditions": data.get("conditions", [])}
+    # Parse and format header fields here so build_pdf only lays them out
+    date_format = config.get("date_format", "%d %b %Y")
+    patient_meta = {
+        "name": patient_name,
+        "dob": data.get("dob"),
+        "dob_dt": try_parse_date(data.get("dob")),
+        "gender": data.get("gender"),
+        "conditions_txt": format_conditions(data.get("conditions", []), date_format)
+    }
     build_pdf(filtered_groups, ordered_names, out_file, patient_meta, config)
     print(f"Generated V4 Layout PDF: {out_file}")
 
+def new_global_meta() -> Dict[str, Any]:
+    """Empty accumulator for the tests, doctors and facilities extracted across input files."""
+    return {
+        "tests": defaultdict(lambda: {"id": None, "name": None, "unit": None, "range": None}),
+        "doctors": defaultdict(lambda: {"id": None, "display_name": None, "contexts": set(), "visit_dates": set()}),
+        "facilities": defaultdict(lambda: {"id": None, "name": None, "contexts": set(), "visit_dates": set()}),
+        "used_tests": set() # track which tests actually made it to PDF across all files
+    }
+
+def merge_global_meta(dst: Dict[str, Any], src: Dict[str, Any]):
+    """Folds a per-file meta into dst, following the same precedence rules as proc_node."""
+    for tid, t in src["tests"].items():
+        d = dst["tests"][tid]
+        if d["id"] is None:
+            d.update(t)
+        else:
+            if t["unit"]: d["unit"] = t["unit"]
+            if t["range"]: d["range"] = t["range"]
+
+    for kind, name_key in (("doctors", "display_name"), ("facilities", "name")):
+        for eid, e in src[kind].items():
+            d = dst[kind][eid]
+            if d["id"] is None:
+                d["id"] = eid
+                d[name_key] = e[name_key]
+            d["contexts"] |= e["contexts"]
+            d["visit_dates"] |= e["visit_dates"]
+
+    dst["used_tests"] |= src["used_tests"]
+
+def _process_file_isolated(file_path: Path, config: Dict[str, Any], output_dir: Path) -> Dict[str, Any]:
+    """Worker entry point: processes one file against a private meta and returns it picklable."""
+    meta = new_global_meta()
+    process_file(file_path, config, output_dir, meta)
+    # The defaultdict factories are lambdas and cannot cross the process boundary
+    return {k: dict(v) if isinstance(v, defaultdict) else v for k, v in meta.items()}
+
 def main():
     parser = argparse.ArgumentParser(description="Generate V4 PDF and extract JSON data")
     parser.add_argument("--config", required=True, help="Path to config.json")
@@ -562,8 +744,7 @@ def main():
         print(f"Config file not found: {config_path}")
         return
 
-    with config_path.open("r", encoding="utf-8") as f:
-        config = json.load(f)
+    config = load_data(config_path)
 
     repo_root = Path.cwd()
     input_val = config.get("input_path")
@@ -574,39 +755,39 @@ def main():
     output_dir.mkdir(parents=True, exist_ok=True)
 
     # Global extractors
-    global_meta = {
-        "tests": {},
-        "doctors": {},
-        "facilities": {},
-        "used_tests": set() # track which tests actually made it to PDF across all files
-    }
+    global_meta = new_global_meta()
 
     if input_path.is_file() and input_path.suffix == ".json":
         process_file(input_path, config, output_dir, global_meta)
     elif input_path.is_dir():
-        for f in input_path.glob("*.json"):
-            process_file(f, config, output_dir, global_meta)
+        files = list(input_path.glob("*.json"))
+        if len(files) > 1:
+            # Files only share global_meta, so render them in worker processes and merge
+            # each partial meta back in submission order.
+            workers = min(len(files), os.cpu_count() or 1)
+            with ProcessPoolExecutor(max_workers=workers) as ex:
+                for partial in ex.map(_process_file_isolated, files, repeat(config), repeat(output_dir)):
+                    merge_global_meta(global_meta, partial)
+        else:
+            for f in files:
+                process_file(f, config, output_dir, global_meta)
 
     # --- Write data.json ---
+    # Sets become sorted lists while the output is assembled
     final_output = {
          "tests": list(global_meta["tests"].values()),
-         "doctors": [],
-         "facilities": []
+         "doctors": [
+             {**d, "contexts": sorted(d["contexts"]), "visit_dates": sorted(d["visit_dates"])}
+             for d in global_meta["doctors"].values()
+         ],
+         "facilities": [
+             {**f, "contexts": sorted(f["contexts"]), "visit_dates": sorted(f["visit_dates"])}
+             for f in global_meta["facilities"].values()
+         ]
     }
 
-    for d_id, d_data in global_meta["doctors"].items():
-        d_data["contexts"] = sorted(list(d_data["contexts"]))
-        d_data["visit_dates"] = sorted(list(d_data["visit_dates"]))
-        final_output["doctors"].append(d_data)
-
-    for f_id, f_data in global_meta["facilities"].items():
-        f_data["contexts"] = sorted(list(f_data["contexts"]))
-        f_data["visit_dates"] = sorted(list(f_data["visit_dates"]))
-        final_output["facilities"].append(f_data)
-
     data_json_path = output_dir / "data.json"
-    with data_json_path.open("w", encoding="utf-8") as f:
-         json.dump(final_output, f, indent=4)
+    data_json_path.write_bytes(orjson.dumps(final_output, option=orjson.OPT_INDENT_2))
     print(f"Generated extraction: {data_json_path}")
 
     # --- Write report_YYMMDDHHMM.json (Unrolled Config) ---
@@ -616,8 +797,7 @@ def main():
     timestamp_str = datetime.now().strftime("%y%m%d%H%M")
     report_cfg_path = output_dir / f"report_{timestamp_str}.json"
 
-    with report_cfg_path.open("w", encoding="utf-8") as f:
-         json.dump(unrolled_config, f, indent=4)
+    report_cfg_path.write_bytes(orjson.dumps(unrolled_config, option=orjson.OPT_INDENT_2))
     print(f"Generated Unrolled Config: {report_cfg_path}")
 
 if __name__ == "__main__":